@@ -1,13 +1,17 @@
 import datetime
 
+from django.apps import apps
+from django.core import checks
 from django.core.exceptions import ValidationError
 from django import forms
 from django.db import models
+from django.db.models import signals
 from django.forms.widgets import Select
 from django.utils.dates import MONTHS
 from django.utils.safestring import mark_safe
 
-from .flexibledate import flexibledate, parse_flexibledate
+from .rollup import connect_rollup_signals
+from .flexibledate import flexibledate, parse_flexibledate, _MIN_VALUE, _MAX_VALUE
 
 
 class FlexibleDateWidget(forms.Widget):
@@ -148,6 +152,49 @@ class FlexibleDateDescriptor(object):
         instance.__dict__[self.field_name] = value
 
 
+def flexibledate_check_sql(column, vendor=None):
+    """
+    Returns a SQL condition enforcing the flexibledate rules on ``column``:
+    a four digit year, a month between 0 and 12, and a day that is either 0
+    or valid for its month (leap years included). A day requires a month.
+
+    Only modulo and exact division are used so that the arithmetic gives the
+    same result on every backend. Modulo is written as MOD() rather than a
+    bare % (which breaks DDL executed with parameters), except on SQLite
+    where MOD() is only available in builds with the math functions.
+    """
+    if vendor == 'sqlite':
+        mod = lambda expr, n: '(%s %% %d)' % (expr, n)
+    else:
+        mod = lambda expr, n: 'MOD(%s, %d)' % (expr, n)
+    year = '((%s - %s) / 10000)' % (column, mod(column, 10000))
+    month = '((%s - %s) / 100)' % (mod(column, 10000), mod(column, 100))
+    day = mod(column, 100)
+    leap = '(%s = 0 AND (%s <> 0 OR %s = 0))' % (
+        mod(year, 4), mod(year, 100), mod(year, 400))
+    days_in_month = (
+        'CASE WHEN %(month)s IN (4, 6, 9, 11) THEN 30 '
+        'WHEN %(month)s = 2 THEN CASE WHEN %(leap)s THEN 29 ELSE 28 END '
+        'ELSE 31 END' % {'month': month, 'leap': leap}
+    )
+    return (
+        '%(column)s BETWEEN %(min)d AND %(max)d '
+        'AND %(month)s BETWEEN 0 AND 12 '
+        'AND (%(day)s = 0 OR (%(month)s > 0 AND %(day)s <= %(days)s))' % {
+            'column': column,
+            'min': _MIN_VALUE,
+            'max': _MAX_VALUE,
+            'month': month,
+            'day': day,
+            'days': days_in_month,
+        }
+    )
+
+
+# Models with rollup fields get their signal handlers once they are prepared.
+signals.class_prepared.connect(connect_rollup_signals, dispatch_uid='flexibledatefield.rollup')
+
+
 class FlexibleDateField(models.PositiveIntegerField):
 
     def from_db_value(self, value, expression, connection, context):
@@ -167,8 +214,37 @@ class FlexibleDateField(models.PositiveIntegerField):
 
     def __init__(self, *args, **kwargs):
         self.years = kwargs.pop('years',None)
+        # When the database enforces the flexibledate rules with a CHECK
+        # constraint, plain integers are trusted and written without parsing.
+        self.check_constraint = kwargs.pop('check_constraint', False)
+        # Keep per year/month counts in FlexibleDateRollup (see rollup.py).
+        self.rollup = kwargs.pop('rollup', False)
         super(FlexibleDateField, self).__init__(*args, **kwargs)
 
+    def check(self, **kwargs):
+        errors = super(FlexibleDateField, self).check(**kwargs)
+        if self.rollup and not apps.is_installed('flexibledatefield'):
+            errors.append(checks.Error(
+                "rollup=True requires 'flexibledatefield' in INSTALLED_APPS.",
+                obj=self,
+                id='flexibledatefield.E001',
+            ))
+        return errors
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(FlexibleDateField, self).deconstruct()
+        if self.check_constraint:
+            kwargs['check_constraint'] = True
+        if self.rollup:
+            kwargs['rollup'] = True
+        return name, path, args, kwargs
+
+    def db_check(self, connection):
+        if not self.check_constraint:
+            return super(FlexibleDateField, self).db_check(connection)
+        return flexibledate_check_sql(
+            connection.ops.quote_name(self.column), connection.vendor)
+
     def to_python(self, value):
         """
         Validates that the input can be converted to a date.
@@ -185,6 +261,29 @@ class FlexibleDateField(models.PositiveIntegerField):
         except (ValueError, TypeError) as err:
             raise ValidationError(err)
 
+    def is_trusted_value(self, value, connection=None):
+        """
+        Whether ``value`` can be written without parsing: an eight digit int
+        on a column whose CHECK constraint the database actually enforces.
+        """
+        if not self.check_constraint or type(value) is not int:
+            return False
+        if connection is not None and not connection.features.supports_column_check_constraints:
+            return False
+        return _MIN_VALUE <= value <= _MAX_VALUE
+
+    def pre_save(self, model_instance, add):
+        # Read the raw value so that trusted integers skip the descriptor's parse
+        value = model_instance.__dict__.get(self.attname)
+        if self.is_trusted_value(value):
+            return value
+        return super(FlexibleDateField, self).pre_save(model_instance, add)
+
+    def get_db_prep_save(self, value, connection):
+        if self.is_trusted_value(value, connection):
+            return value
+        return super(FlexibleDateField, self).get_db_prep_save(value, connection)
+
     def get_prep_value(self, value):
         if not value:
             return None
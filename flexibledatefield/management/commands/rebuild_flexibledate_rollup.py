@@ -0,0 +1,53 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from flexibledatefield.rollup import rebuild_rollup, rollup_fields
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the year/month rollup counts of FlexibleDateFields declared with "
+            "rollup=True. Pause writes to the models while this runs.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fields', nargs='*', metavar='app_label.Model[.field]',
+            help='Restrict the rebuild to these models or fields (default: all rollup fields).')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of rows read per query (default: 2000).')
+        parser.add_argument(
+            '--database', default='default',
+            help='Database to rebuild the counts in (default: "default").')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        for model, field in self.get_targets(options['fields']):
+            counts = rebuild_rollup(model, field.name, chunk_size=options['chunk_size'],
+                                    using=options['database'])
+            self.stdout.write("%s.%s: %d records in %d buckets" % (
+                model._meta.label, field.name, sum(counts.values()), len(counts)))
+
+    def get_targets(self, labels):
+        if not labels:
+            # Proxies and inheritance children share their parents' fields.
+            return [(model, field) for model in apps.get_models()
+                    for field in rollup_fields(model) if field.model is model]
+        targets = []
+        for label in labels:
+            parts = label.split('.')
+            if len(parts) not in (2, 3):
+                raise CommandError("'%s' is not of the form app_label.Model[.field]" % label)
+            try:
+                model = apps.get_model(parts[0], parts[1])
+            except LookupError as err:
+                raise CommandError(str(err))
+            fields = rollup_fields(model)
+            if len(parts) == 3:
+                fields = [f for f in fields if f.name == parts[2]]
+            if not fields:
+                raise CommandError("%s has no FlexibleDateField with rollup=True" % label)
+            # Fields of a proxy or parent model are rebuilt for the model storing them.
+            targets.extend((field.model, field) for field in fields
+                           if (field.model, field) not in targets)
+        return targets
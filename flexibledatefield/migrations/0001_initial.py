@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlexibleDateRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=255)),
+                ('field_name', models.CharField(max_length=255)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField(default=0)),
+                ('precision', models.CharField(choices=[('year', 'Year'), ('month', 'Month'), ('day', 'Day')], max_length=5)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('model_label', 'field_name', 'year', 'month', 'precision'),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='flexibledaterollup',
+            unique_together=set([('model_label', 'field_name', 'year', 'month', 'precision')]),
+        ),
+    ]
@@ -1 +1,44 @@
 # File here so earlier versions of Django treat this as an app
+from django.db import models
+
+
+class FlexibleDateRollupManager(models.Manager):
+
+    def for_field(self, model, field_name):
+        """
+        Returns the rollup rows for one FlexibleDateField, e.g.
+
+            >>> FlexibleDateRollup.objects.for_field(Publication, 'date_published')
+        """
+        model = model._meta.get_field(field_name).model
+        return self.filter(model_label=model._meta.label_lower, field_name=field_name)
+
+
+class FlexibleDateRollup(models.Model):
+    """
+    Number of records per (year, month, precision) bucket of a
+    FlexibleDateField declared with rollup=True. Year-only dates are counted
+    with a month of 0.
+    """
+    PRECISION_CHOICES = (
+        ('year', 'Year'),
+        ('month', 'Month'),
+        ('day', 'Day'),
+    )
+
+    model_label = models.CharField(max_length=255)
+    field_name = models.CharField(max_length=255)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField(default=0)
+    precision = models.CharField(max_length=5, choices=PRECISION_CHOICES)
+    count = models.IntegerField(default=0)
+
+    objects = FlexibleDateRollupManager()
+
+    class Meta:
+        unique_together = (('model_label', 'field_name', 'year', 'month', 'precision'),)
+        ordering = ('model_label', 'field_name', 'year', 'month', 'precision')
+
+    def __str__(self):
+        return "%s.%s %04d-%02d (%s): %d" % (
+            self.model_label, self.field_name, self.year, self.month, self.precision, self.count)
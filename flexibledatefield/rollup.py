@@ -0,0 +1,226 @@
+"""
+Incrementally maintained year/month counts for FlexibleDateFields declared
+with rollup=True.
+
+Saves and deletes of single instances are tracked through signals, which
+re-read the stored value of the row so that stale instances can't skew the
+counts. Writes that bypass signals (bulk_create, QuerySet.update) must go
+through rollup_bulk_create / apply_rollup_deltas, or be followed by
+rebuild_rollup (also available as the rebuild_flexibledate_rollup
+management command).
+
+Each saved or deleted instance costs one extra SELECT plus an UPDATE (or
+INSERT/DELETE) per changed bucket, so a QuerySet.delete() of N rows runs
+about 2N-3N extra queries. The stored value is read without a row lock, so
+concurrent saves of the same row can leave the counts off until the next
+rebuild.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, signals
+
+from .flexibledate import flexibledate, _MIN_VALUE, _MAX_VALUE
+
+# Stored values of the row, read before a save or delete and consumed after it.
+OLD_VALUES_ATTR = '_flexibledate_rollup_old_values'
+
+
+def rollup_bucket(value):
+    """
+    Returns the (year, month, precision) bucket for a flexible date value,
+    or None for an empty value.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, flexibledate):
+        value = int(value.value)
+    elif type(value) is not int or not _MIN_VALUE <= value <= _MAX_VALUE:
+        # Short ints such as 2011 are stored as 20110000 by the field.
+        value = flexibledate.parse(value).value
+    year, month, day = value // 10000, value // 100 % 100, value % 100
+    if day:
+        precision = 'day'
+    elif month:
+        precision = 'month'
+    else:
+        precision = 'year'
+    return (year, month, precision)
+
+
+def _rollup_model():
+    from .models import FlexibleDateRollup
+    return FlexibleDateRollup
+
+
+def rollup_fields(model):
+    """
+    Returns the rollup fields stored in the model's table or, for
+    multi-table inheritance, in the tables of its parents.
+    """
+    return [f for f in model._meta.concrete_fields if getattr(f, 'rollup', False)]
+
+
+def apply_rollup_deltas(model, field_name, deltas, using=None):
+    """
+    Adds a {bucket: delta} mapping to the rollup rows of a field. Buckets
+    that drop to zero are removed; decrements of buckets that have no row
+    are dropped, as the counts haven't been built yet (see rebuild_rollup).
+    """
+    rollup = _rollup_model()
+    label = model._meta.concrete_model._meta.label_lower
+    manager = rollup.objects.db_manager(using)
+    for (year, month, precision), delta in deltas.items():
+        if not delta:
+            continue
+        rows = manager.filter(model_label=label, field_name=field_name,
+                              year=year, month=month, precision=precision)
+        if rows.update(count=F('count') + delta):
+            if delta < 0:
+                rows.filter(count__lte=0).delete()
+            continue
+        if delta < 0:
+            continue
+        try:
+            with transaction.atomic(using=manager.db):
+                manager.create(model_label=label, field_name=field_name, year=year,
+                               month=month, precision=precision, count=delta)
+        except IntegrityError:
+            # Another writer created the row in the meantime.
+            rows.update(count=F('count') + delta)
+
+
+def rollup_bulk_create(model, objs, **kwargs):
+    """
+    Calls bulk_create on the model's default manager and counts the new
+    objects in every rollup field of the model.
+    """
+    if kwargs.get('ignore_conflicts'):
+        raise ValueError("rollup_bulk_create() can't tell which objects were "
+                         "inserted when ignore_conflicts is set.")
+    manager = model._default_manager
+    using = kwargs.pop('using', None) or manager.db
+    with transaction.atomic(using=using):
+        objs = manager.db_manager(using).bulk_create(objs, **kwargs)
+        for field in rollup_fields(model):
+            deltas = Counter()
+            for obj in objs:
+                bucket = rollup_bucket(obj.__dict__.get(field.attname))
+                if bucket:
+                    deltas[bucket] += 1
+            apply_rollup_deltas(field.model, field.name, deltas, using=using)
+    return objs
+
+
+def rebuild_rollup(model, field_name, chunk_size=2000, using=None):
+    """
+    Recomputes the rollup rows of a field from scratch, reading the table in
+    primary key order chunk_size rows at a time.
+
+    Each chunk is read in its own query and the counts are only replaced at
+    the end, so writes to the model should be paused while this runs:
+    changes made during the scan are lost.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1, not %r" % chunk_size)
+    rollup = _rollup_model()
+    field = model._meta.get_field(field_name)
+    model = field.model
+    # The base manager, like the signal handlers, sees every row.
+    manager = model._base_manager.db_manager(using)
+    pk_name = model._meta.pk.attname
+    rows = manager.exclude(**{'%s__isnull' % field.attname: True}).order_by(pk_name)
+    counts = Counter()
+    last_pk = None
+    while True:
+        chunk = rows
+        if last_pk is not None:
+            chunk = chunk.filter(**{'%s__gt' % pk_name: last_pk})
+        chunk = list(chunk.values_list(pk_name, field.attname)[:chunk_size])
+        if not chunk:
+            break
+        for pk, value in chunk:
+            bucket = rollup_bucket(value)
+            if bucket:
+                counts[bucket] += 1
+        last_pk = chunk[-1][0]
+    with transaction.atomic(using=manager.db):
+        rollup.objects.db_manager(manager.db).for_field(model, field.name).delete()
+        rollup.objects.db_manager(manager.db).bulk_create([
+            rollup(model_label=model._meta.label_lower, field_name=field.name,
+                   year=year, month=month, precision=precision, count=count)
+            for (year, month, precision), count in sorted(counts.items())
+        ])
+    return counts
+
+
+def _stored_values(model, instance, fields, using):
+    values = None
+    if instance.pk is not None:
+        values = model._base_manager.db_manager(using).filter(pk=instance.pk).values_list(
+            *[f.attname for f in fields]).first()
+    return dict(zip(fields, values or [None] * len(fields)))
+
+
+def _update_counts(old_values, instance=None, using=None):
+    for field, old_value in old_values.items():
+        old_bucket = rollup_bucket(old_value)
+        new_bucket = None
+        if instance is not None:
+            new_bucket = rollup_bucket(instance.__dict__.get(field.attname))
+        if old_bucket == new_bucket:
+            continue
+        deltas = Counter()
+        if old_bucket:
+            deltas[old_bucket] -= 1
+        if new_bucket:
+            deltas[new_bucket] += 1
+        apply_rollup_deltas(field.model, field.name, deltas, using=using)
+
+
+def connect_rollup_signals(sender, **kwargs):
+    """
+    class_prepared receiver connecting the rollup handlers to every model
+    with a rollup field, including proxies and multi-table inheritance
+    children of the model declaring it. Handlers are only connected per
+    model so that other models keep Django's fast delete path.
+    """
+    if sender._meta.abstract or not rollup_fields(sender):
+        return
+    uid = 'flexibledatefield.rollup'
+    signals.pre_save.connect(read_before_save, sender=sender, dispatch_uid=uid)
+    signals.post_save.connect(update_on_save, sender=sender, dispatch_uid=uid)
+    signals.pre_delete.connect(read_before_delete, sender=sender, dispatch_uid=uid)
+    signals.post_delete.connect(update_on_delete, sender=sender, dispatch_uid=uid)
+
+
+def read_before_save(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    instance.__dict__.pop(OLD_VALUES_ATTR, None)
+    if raw:
+        return
+    fields = [f for f in rollup_fields(sender)
+              if update_fields is None or f.name in update_fields]
+    if fields:
+        instance.__dict__[OLD_VALUES_ATTR] = _stored_values(sender, instance, fields, using)
+
+
+def update_on_save(sender, instance, raw=False, using=None, **kwargs):
+    old_values = instance.__dict__.pop(OLD_VALUES_ATTR, None)
+    if old_values and not raw:
+        _update_counts(old_values, instance, using=using)
+
+
+def read_before_delete(sender, instance, using=None, **kwargs):
+    # Deleting a child also deletes (and signals) its parent rows, so only
+    # the fields stored in the sender's own table are counted here.
+    instance.__dict__.pop(OLD_VALUES_ATTR, None)
+    concrete_model = sender._meta.concrete_model
+    fields = [f for f in rollup_fields(sender) if f.model is concrete_model]
+    if fields:
+        instance.__dict__[OLD_VALUES_ATTR] = _stored_values(sender, instance, fields, using)
+
+
+def update_on_delete(sender, instance, using=None, **kwargs):
+    old_values = instance.__dict__.pop(OLD_VALUES_ATTR, None)
+    if old_values:
+        _update_counts(old_values, using=using)
@@ -7,5 +7,9 @@ setup(name='django-flexibledatefield',
       description='A custom field that can store a date with flexible granularity (i.e. only year, year+month, or full date)',
       author='Jordan Reiter',
       author_email='jordanreiter@gmail.com',
-      packages=['flexibledatefield'],
+      packages=['flexibledatefield',
+                'flexibledatefield.management',
+                'flexibledatefield.management.commands',
+                'flexibledatefield.migrations',
+                'flexibledatefield.templatetags'],
      )
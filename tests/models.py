@@ -0,0 +1,29 @@
+from django.db import models
+
+from flexibledatefield.fields import FlexibleDateField
+
+
+class PublishedManager(models.Manager):
+
+    def get_queryset(self):
+        return super(PublishedManager, self).get_queryset().exclude(title='draft')
+
+
+class Publication(models.Model):
+    title = models.CharField(max_length=100, blank=True)
+    date_published = FlexibleDateField(null=True, blank=True, rollup=True)
+
+    objects = PublishedManager()
+
+
+class ProxyPublication(Publication):
+    class Meta:
+        proxy = True
+
+
+class Article(Publication):
+    date_written = FlexibleDateField(null=True, blank=True, rollup=True)
+
+
+class Event(models.Model):
+    date = FlexibleDateField(null=True, blank=True, check_constraint=True)
@@ -0,0 +1,13 @@
+SECRET_KEY = 'flexibledatefield-tests'
+
+INSTALLED_APPS = [
+    'flexibledatefield',
+    'tests',
+]
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
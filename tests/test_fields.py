@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from flexibledatefield.fields import flexibledate_check_sql
+
+from .models import Event
+
+
+class CheckConstraintTests(TestCase):
+
+    def test_trusted_ints_are_checked_by_the_database(self):
+        Event.objects.bulk_create([Event(date=20120229), Event(date=20110400), Event(date=20110000)])
+        self.assertEqual(sorted(int(e.date) for e in Event.objects.all()),
+                         [20110000, 20110400, 20120229])
+        for value in (20110229, 20110431, 20111300, 20110012):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                Event.objects.create(date=value)
+
+    def test_unenforced_constraints_fall_back_to_parsing(self):
+        # e.g. MySQL before 8.0.16 accepts CHECK constraints but ignores them
+        with mock.patch.object(connection.features, 'supports_column_check_constraints', False):
+            with self.assertRaises(ValidationError), transaction.atomic():
+                Event.objects.create(date=20110229)
+            Event.objects.create(date=20120229)
+        self.assertEqual([int(e.date) for e in Event.objects.all()], [20120229])
+
+    def test_other_values_are_parsed(self):
+        Event.objects.create(date=2011)
+        Event.objects.create(date='2012-05-06')
+        self.assertEqual(sorted(int(e.date) for e in Event.objects.all()), [20110000, 20120506])
+
+    def test_lookups_are_parsed(self):
+        Event.objects.create(date=20100000)
+        Event.objects.create(date=20110422)
+        self.assertEqual(Event.objects.filter(date__gte=2011).count(), 1)
+        self.assertEqual(Event.objects.filter(date=20110422).count(), 1)
+
+    def test_check_sql(self):
+        field = Event._meta.get_field('date')
+        self.assertIn('BETWEEN 10000000 AND 99991231', field.db_check(connection))
+        # A bare % would break DDL executed with parameters on other backends.
+        self.assertNotIn('%', flexibledate_check_sql('"date"', 'postgresql'))
@@ -0,0 +1,167 @@
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+
+from django.core.management import CommandError, call_command
+from django.db.models.deletion import Collector
+from django.test import TestCase
+
+from flexibledatefield.models import FlexibleDateRollup
+from flexibledatefield.rollup import rebuild_rollup, rollup_bulk_create
+
+from .models import Article, Event, ProxyPublication, Publication
+
+
+def counts(model=Publication, field_name='date_published'):
+    return {
+        (row.year, row.month, row.precision): row.count
+        for row in FlexibleDateRollup.objects.for_field(model, field_name)
+    }
+
+
+class RollupTests(TestCase):
+
+    def test_create(self):
+        Publication.objects.create(date_published=20110422)
+        Publication.objects.create(date_published=20110400)
+        Publication.objects.create(date_published=20110000)
+        Publication.objects.create(date_published=20110415)
+        Publication.objects.create()
+        self.assertEqual(counts(), {
+            (2011, 4, 'day'): 2,
+            (2011, 4, 'month'): 1,
+            (2011, 0, 'year'): 1,
+        })
+
+    def test_create_with_unparsed_values(self):
+        pub = Publication.objects.create(date_published=2011)
+        Publication.objects.create(date_published='2011-04-22')
+        self.assertEqual(counts(), {(2011, 0, 'year'): 1, (2011, 4, 'day'): 1})
+        pub.date_published = '2012-05-06'
+        pub.save()
+        self.assertEqual(counts(), {(2012, 5, 'day'): 1, (2011, 4, 'day'): 1})
+
+    def test_update_across_buckets(self):
+        pub = Publication.objects.create(date_published=20110422)
+        pub = Publication.objects.get(pk=pub.pk)
+        pub.date_published = 20120500
+        pub.save()
+        self.assertEqual(counts(), {(2012, 5, 'month'): 1})
+        pub.date_published = None
+        pub.save()
+        self.assertEqual(counts(), {})
+
+    def test_delete(self):
+        pub = Publication.objects.create(date_published=20110422)
+        Publication.objects.create(date_published=20110422)
+        pub.delete()
+        self.assertEqual(counts(), {(2011, 4, 'day'): 1})
+        Publication.objects.all().delete()
+        self.assertEqual(counts(), {})
+
+    def test_update_fields_excluding_field(self):
+        pub = Publication.objects.create(date_published=20110422)
+        pub.date_published = 20120000
+        pub.title = 'Changed'
+        pub.save(update_fields=['title'])
+        self.assertEqual(counts(), {(2011, 4, 'day'): 1})
+
+    def test_deferred_field(self):
+        pub = Publication.objects.create(date_published=20110422)
+        pub = Publication.objects.defer('date_published').get(pk=pub.pk)
+        pub.title = 'Changed'
+        pub.save()
+        self.assertEqual(counts(), {(2011, 4, 'day'): 1})
+        pub.date_published = 20120000
+        pub.save()
+        self.assertEqual(counts(), {(2012, 0, 'year'): 1})
+
+    def test_stale_instances(self):
+        pub = Publication.objects.create(date_published=20110422)
+        Publication(pk=pub.pk, date_published=20120000).save()
+        self.assertEqual(counts(), {(2012, 0, 'year'): 1})
+        Publication.objects.get(pk=pub.pk).delete()
+        pub.date_published = 20130000
+        pub.save()
+        self.assertEqual(counts(), {(2013, 0, 'year'): 1})
+
+    def test_proxy_model(self):
+        pub = ProxyPublication.objects.create(date_published=20110422)
+        self.assertEqual(counts(ProxyPublication), {(2011, 4, 'day'): 1})
+        pub.delete()
+        self.assertEqual(counts(), {})
+
+    def test_inheritance(self):
+        article = Article.objects.create(date_published=20110422, date_written=20100000)
+        self.assertEqual(counts(Article), {(2011, 4, 'day'): 1})
+        self.assertEqual(counts(Article, 'date_written'), {(2010, 0, 'year'): 1})
+        article.delete()
+        self.assertEqual(counts(), {})
+        self.assertEqual(counts(Article, 'date_written'), {})
+
+    def test_fast_delete_unaffected(self):
+        collector = Collector(using='default')
+        self.assertTrue(collector.can_fast_delete(Event.objects.all()))
+        self.assertTrue(collector.can_fast_delete(FlexibleDateRollup.objects.all()))
+        self.assertFalse(collector.can_fast_delete(Publication.objects.all()))
+
+    def test_delete_before_build(self):
+        pub = Publication.objects.create(date_published=20110422)
+        FlexibleDateRollup.objects.all().delete()
+        pub.delete()
+        self.assertFalse(FlexibleDateRollup.objects.exists())
+
+    def test_bulk_create(self):
+        rollup_bulk_create(Publication, [
+            Publication(date_published=20110422),
+            Publication(date_published=20110422),
+            Publication(date_published=20110000),
+            Publication(date_published=2011),
+            Publication(),
+        ])
+        self.assertEqual(counts(), {(2011, 4, 'day'): 2, (2011, 0, 'year'): 2})
+
+    def test_bulk_create_ignore_conflicts(self):
+        with self.assertRaises(ValueError):
+            rollup_bulk_create(Publication, [Publication()], ignore_conflicts=True)
+
+    def test_rebuild_matches_incremental(self):
+        pub = Publication.objects.create(date_published=20110422)
+        for value in (20110422, 20110400, 20100000, None, 20120101):
+            Publication.objects.create(date_published=value)
+        Article.objects.create(date_published=20110400, date_written=20110400)
+        Publication.objects.create(date_published=20110400, title='draft')
+        pub.date_published = 20100000
+        pub.save()
+        Publication.objects.filter(date_published=20120101).delete()
+        incremental = counts()
+        FlexibleDateRollup.objects.all().delete()
+        rebuild_rollup(Publication, 'date_published', chunk_size=2)
+        self.assertEqual(counts(), incremental)
+
+    def test_rebuild_command(self):
+        Publication.objects.create(date_published=20110422)
+        Publication.objects.create(date_published=20090000)
+        Article.objects.create(date_published=20110400, date_written=20100000)
+        expected = (counts(), counts(Article, 'date_written'))
+        FlexibleDateRollup.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_flexibledate_rollup', '--chunk-size', '1', stdout=out)
+        self.assertEqual((counts(), counts(Article, 'date_written')), expected)
+        self.assertIn('tests.Publication.date_published: 3 records in 3 buckets', out.getvalue())
+        self.assertIn('tests.Article.date_written: 1 records in 1 buckets', out.getvalue())
+
+    def test_rebuild_chunk_size(self):
+        Publication.objects.create(date_published=20110422)
+        with self.assertRaises(ValueError):
+            rebuild_rollup(Publication, 'date_published', chunk_size=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_flexibledate_rollup', '--chunk-size', '0')
+        self.assertEqual(counts(), {(2011, 4, 'day'): 1})
+
+    def test_check_requires_app(self):
+        field = Publication._meta.get_field('date_published')
+        self.assertEqual(field.check(), [])
+        with mock.patch.object(apps, 'is_installed', return_value=False):
+            self.assertEqual([e.id for e in field.check()], ['flexibledatefield.E001'])